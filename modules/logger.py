@@ -8,7 +8,17 @@ import glob
 
 class Logger:
     """Logger klasse voor het bijhouden van acties en fouten in Excelladin Reloaded"""
-    
+
+    # Numerieke waarden per berichttype, zodat berichten onder het
+    # ingestelde minimumniveau goedkoop overgeslagen kunnen worden
+    NIVEAUS = {
+        "INFO": 20,
+        "ACTIE": 20,
+        "PATCH": 20,
+        "WAARSCHUWING": 30,
+        "FOUT": 40,
+    }
+
     def __init__(self, logBestandsnaam=None, max_logfiles=5):
         """
         Initialiseer de logger
@@ -33,6 +43,9 @@ class Logger:
         # Maak volledige pad naar logbestand
         self.logBestandsnaam = os.path.join("logs", f"All_logs_combined_{datumtijd}.txt")
         self.max_logfiles = max_logfiles
+
+        # Minimaal berichtniveau dat naar het logbestand gaat
+        self.minimumNiveau = "INFO"
         
         # Controleer en ruim oude logbestanden op indien nodig
         self._ruim_oude_logs_op()
@@ -95,14 +108,31 @@ class Logger:
         
         return f"[{huidigetijd}] [{berichtType}] {prefix}{bericht}"
     
+    def isEnabledFor(self, berichtType):
+        """
+        Controleer of berichten van dit type gelogd worden
+
+        Gebruik dit op hete paden om het opbouwen van logberichten over
+        te slaan als ze toch niet naar het logbestand gaan.
+
+        Args:
+            berichtType (str): Type bericht (INFO, WAARSCHUWING, FOUT)
+
+        Returns:
+            bool: True als het berichttype gelogd wordt
+        """
+        return self.NIVEAUS.get(berichtType, 20) >= self.NIVEAUS.get(self.minimumNiveau, 20)
+
     def log(self, bericht, berichtType="INFO"):
         """
         Log een bericht naar het logbestand
-        
+
         Args:
             bericht (str): Het te loggen bericht
             berichtType (str): Type bericht (INFO, WAARSCHUWING, FOUT)
         """
+        if not self.isEnabledFor(berichtType):
+            return
         try:
             with open(self.logBestandsnaam, 'a', encoding='utf-8') as bestand:
                 bestand.write(self._formateerBericht(berichtType, bericht) + "\n")
@@ -3,9 +3,53 @@ Settings module voor Excelladin Reloaded
 Beheert applicatie-instellingen zoals laatst geopende bestanden
 """
 import os
-import configparser
+import io
+import sys
+import atexit
+import functools
+from contextlib import contextmanager
+from types import MappingProxyType
 from modules.logger import logger
 
+# Standaardinstellingen, eenmalig bij het laden van de module opgebouwd en
+# onveranderlijk zodat alle Instellingen-instanties dezelfde structuur delen
+_STANDAARD_INSTELLINGEN = MappingProxyType({
+    'Algemeen': MappingProxyType({
+        'LaatsteBestand': '',
+        'OnthoudBestand': 'False',
+    }),
+    'Interface': MappingProxyType({
+        'ToonTooltips': 'True',
+    }),
+    'Rentpro': MappingProxyType({
+        'Gebruikersnaam': '',
+        'Wachtwoord': '',
+    }),
+})
+
+# Sentinel om een echte miss te onderscheiden van een opgeslagen lege waarde
+_ONTBREEKT = object()
+
+@functools.lru_cache(maxsize=1)
+def _cwd():
+    """
+    Haal de huidige werkdirectory op (gecached voor de levensduur van het proces)
+
+    De applicatie wisselt nooit van werkdirectory; mocht dat ooit wel
+    gebeuren, roep dan `_cwd.cache_clear()` aan na de chdir.
+    """
+    return os.getcwd()
+
+@functools.lru_cache(maxsize=128)
+def _absoluut(pad, werkdir):
+    """
+    Converteer een pad naar absoluut, gecached per (pad, werkdirectory)
+
+    De werkdirectory zit in de sleutel zodat de cache vanzelf ongeldig
+    wordt wanneer `_cwd.cache_clear()` na een chdir wordt aangeroepen.
+    """
+    return os.path.abspath(pad)
+
 def maak_relatief_pad(pad):
     """
     Converteer een absoluut pad naar een relatief pad t.o.v. de huidige werkdirectory
@@ -22,10 +66,7 @@ def maak_relatief_pad(pad):
             return pad
         
         # Converteer naar relatief pad t.o.v. huidige werkdirectory
-        werkdir = os.getcwd()
-        rel_pad = os.path.relpath(pad, werkdir)
-        logger.logInfo(f"Pad geconverteerd naar relatief: {rel_pad}")
-        return rel_pad
+        return os.path.relpath(pad, _cwd())
     except Exception as e:
         logger.logFout(f"Fout bij converteren naar relatief pad: {e}")
         return pad  # Bij fouten, geef het originele pad terug
@@ -45,10 +86,9 @@ def maak_absoluut_pad(pad):
         if os.path.isabs(pad):
             return pad
         
-        # Converteer naar absoluut pad
-        abs_pad = os.path.abspath(pad)
-        logger.logInfo(f"Pad geconverteerd naar absoluut: {abs_pad}")
-        return abs_pad
+        # Converteer naar absoluut pad; hetzelfde relatieve pad wordt vaak
+        # herhaald opgevraagd (bijv. het laatst geopende bestand)
+        return _absoluut(pad, _cwd())
     except Exception as e:
         logger.logFout(f"Fout bij converteren naar absoluut pad: {e}")
         return pad  # Bij fouten, geef het originele pad terug
@@ -64,13 +104,12 @@ def zorg_voor_directory(directory_pad):
         bool: True als de directory bestaat of succesvol is aangemaakt, anders False
     """
     try:
-        # Converteer naar absoluut pad voor consistentie
-        abs_dir = maak_absoluut_pad(directory_pad)
-        
-        # Controleer of de directory bestaat, zo niet maak deze aan
-        if not os.path.exists(abs_dir):
-            os.makedirs(abs_dir)
-            logger.logInfo(f"Directory aangemaakt: {abs_dir}")
+        # Converteer naar absoluut pad voor consistentie; sla de omweg via
+        # maak_absoluut_pad over als het pad al absoluut is
+        abs_dir = directory_pad if os.path.isabs(directory_pad) else os.path.abspath(directory_pad)
+
+        # exist_ok bespaart de aparte bestaat-check (één syscall minder)
+        os.makedirs(abs_dir, exist_ok=True)
         return True
     except Exception as e:
         logger.logFout(f"Fout bij aanmaken directory {directory_pad}: {e}")
@@ -86,46 +125,90 @@ class Instellingen:
         Args:
             configBestand (str): Pad naar het configuratiebestand
         """
+        # Importeer configparser pas hier: de module (en haar relatief dure
+        # importketen) wordt zo alleen geladen wanneer er echt instellingen
+        # nodig zijn, en niet al bij het importeren van modules.settings
+        import configparser
+
         self.configBestand = configBestand
         self.config = configparser.ConfigParser()
+
+        # Schrijfbeheer: binnen een batch() blok worden wijzigingen
+        # verzameld en pas bij flush() in één keer weggeschreven
+        self._dirty = False
+        self._inBatch = False
         
-        # Standaardinstellingen
-        self.standaardInstellingen = {
-            'Algemeen': {
-                'LaatsteBestand': '',
-                'OnthoudBestand': 'False',
-            },
-            'Interface': {
-                'ToonTooltips': 'True',
-            },
-            'Rentpro': {
-                'Gebruikersnaam': '',
-                'Wachtwoord': '',
-            }
-        }
-        
-        # Laad bestaande instellingen of maak nieuwe
-        if os.path.exists(self.configBestand):
-            try:
-                self.config.read(self.configBestand, encoding='utf-8')
-                logger.logInfo("Instellingen geladen uit bestand")
-            except Exception as e:
-                logger.logFout(f"Fout bij laden instellingen: {e}")
-                self._maakStandaardInstellingen()
-        else:
-            self._maakStandaardInstellingen()
-    
+        # Standaardinstellingen (gedeelde, onveranderlijke modulestructuur)
+        self.standaardInstellingen = _STANDAARD_INSTELLINGEN
+
+
+        # Laad bestaande instellingen of maak nieuwe; door direct te openen
+        # in plaats van eerst os.path.exists te doen kost dit één syscall
+        try:
+            with open(self.configBestand, encoding='utf-8') as bestand:
+                self.config.read_file(bestand)
+            logger.logInfo("Instellingen geladen uit bestand")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.logFout(f"Fout bij laden instellingen: {e}")
+
+        # Vul ontbrekende standaardinstellingen aan; dit schrijft alleen
+        # naar schijf als er daadwerkelijk iets ontbrak
+        self._maakStandaardInstellingen()
+
+        # Forceer bij het afsluiten één duurzame schrijfactie naar schijf,
+        # zodat tussentijdse opslag zonder fsync kan volstaan
+        atexit.register(self._slaOpBijAfsluiten)
+
+        # Bouw de lowercase-index voor snelle hoofdletterongevoelige lookups
+        self._rebuildIndex()
+
+        # Cache de veelgevraagde laatste-bestand instellingen, zodat
+        # haalLaatsteBestand geen config-lookups per aanroep hoeft te doen
+        self._onthoudCache = self.haalOp('Algemeen', 'OnthoudBestand') == 'True'
+        self._laatsteBestandCache = self.haalOp('Algemeen', 'LaatsteBestand', '')
+
+    def _rebuildIndex(self):
+        """
+        Bouw de lowercase-index opnieuw op vanuit de huidige configuratie
+
+        De index koppelt lowercase sectienamen aan hun originele
+        schrijfwijze, zodat haalOp en stelIn een O(1) dict-lookup doen in
+        plaats van alle secties af te lopen. Optienamen hoeven niet in de
+        index: ConfigParser normaliseert die zelf al naar lowercase via
+        optionxform, dus de optie-lookup is al native hoofdletterongevoelig.
+        """
+        # De lowercase sleutels worden geïnterned zodat de dict-lookups in
+        # haalOp/stelIn op pointervergelijking kunnen afhandelen
+        self._idx = {sys.intern(sectie.lower()): sectie
+                     for sectie in self.config.sections()}
+
+        # Negatieve cache: (sectie, optie) paren waarvan bekend is dat ze
+        # ontbreken, zodat herhaalde misses niet steeds de config raken
+        self._ontbrekend = set()
+
     def _maakStandaardInstellingen(self):
-        """Maak standaardinstellingen aan"""
+        """
+        Vul ontbrekende standaardinstellingen aan
+
+        Bestaande waarden blijven ongemoeid; er wordt alleen naar schijf
+        geschreven als er daadwerkelijk een sectie of optie is toegevoegd.
+        """
+        gewijzigd = False
         for sectie, opties in self.standaardInstellingen.items():
             if not self.config.has_section(sectie):
                 self.config.add_section(sectie)
-            
+                gewijzigd = True
+
             for optie, waarde in opties.items():
-                self.config.set(sectie, optie, waarde)
-        
-        self.slaOp()
-        logger.logInfo("Standaardinstellingen aangemaakt")
+                if not self.config.has_option(sectie, optie):
+                    self.config.set(sectie, optie, waarde)
+                    gewijzigd = True
+
+        if gewijzigd:
+            self.slaOp()
+            logger.logInfo("Ontbrekende standaardinstellingen aangemaakt")
     
     def haalOp(self, sectie, optie, standaard=None):
         """
@@ -140,17 +223,20 @@ class Instellingen:
             Waarde van de optie of standaardwaarde
         """
         try:
-            # Converteer sectie en optie naar lowercase voor hoofdletterongevoelige vergelijking
-            sectie_lower = sectie.lower()
-            optie_lower = optie.lower()
-            
-            # Zoek door alle secties en opties op een hoofdletterongevoelige manier
-            for config_sectie in self.config.sections():
-                if config_sectie.lower() == sectie_lower:
-                    for config_optie in self.config.options(config_sectie):
-                        if config_optie.lower() == optie_lower:
-                            return self.config.get(config_sectie, config_optie)
-            
+            sleutel = (sys.intern(sectie.lower()), sys.intern(optie.lower()))
+            if sleutel in self._ontbrekend:
+                return standaard
+
+            # Hoofdletterongevoelige lookup: de sectie via de index, de
+            # optie native via de optionxform-normalisatie van ConfigParser
+            bestaande_sectie = self._idx.get(sleutel[0])
+            if bestaande_sectie is not None:
+                waarde = self.config.get(bestaande_sectie, optie, fallback=_ONTBREEKT)
+                if waarde is not _ONTBREEKT:
+                    return waarde
+
+            # Onthoud de miss zodat de volgende aanroep direct kan terugvallen
+            self._ontbrekend.add(sleutel)
             return standaard
         except Exception as e:
             logger.logFout(f"Fout bij ophalen instelling {sectie}.{optie}: {e}")
@@ -166,46 +252,96 @@ class Instellingen:
             waarde: Nieuwe waarde voor de optie
         """
         try:
-            # Converteer sectie en optie naar lowercase voor hoofdletterongevoelige vergelijking
-            sectie_lower = sectie.lower()
-            optie_lower = optie.lower()
-            
-            # Zoek of er al een sectie bestaat met dezelfde naam (hoofdletterongevoelig)
-            bestaande_sectie = None
-            for config_sectie in self.config.sections():
-                if config_sectie.lower() == sectie_lower:
-                    bestaande_sectie = config_sectie
-                    break
-            
-            # Als er geen sectie bestaat, maak een nieuwe aan met de originele hoofdletters
+            sectie_lower = sys.intern(sectie.lower())
+
+            # Zoek de sectie op in de index; maak een nieuwe aan met de
+            # originele hoofdletters als die nog niet bestaat
+            bestaande_sectie = self._idx.get(sectie_lower)
             if bestaande_sectie is None:
                 self.config.add_section(sectie)
                 bestaande_sectie = sectie
-            
-            # Zoek of er al een optie bestaat met dezelfde naam (hoofdletterongevoelig)
-            bestaande_optie = None
-            for config_optie in self.config.options(bestaande_sectie):
-                if config_optie.lower() == optie_lower:
-                    bestaande_optie = config_optie
-                    break
-            
-            # Gebruik de bestaande optie naam of de originele als er geen bestaat
-            te_gebruiken_optie = bestaande_optie if bestaande_optie else optie
-            
-            # Stel de waarde in
-            self.config.set(bestaande_sectie, te_gebruiken_optie, str(waarde))
-            self.slaOp()
-            logger.logInfo(f"Instelling {bestaande_sectie}.{te_gebruiken_optie} ingesteld op {waarde}")
+                self._idx[sectie_lower] = sectie
+
+            # Stel de waarde in (ConfigParser normaliseert de optienaam
+            # zelf via optionxform); schrijf weg tenzij we in een batch zitten
+            self.config.set(bestaande_sectie, optie, str(waarde))
+            self._ontbrekend.discard((sectie_lower, optie.lower()))
+            self._dirty = True
+
+            # Houd de caches voor het laatste-bestand pad synchroon; de
+            # lowercase optienaam is alleen op dit koude pad nodig
+            if sectie_lower == 'algemeen':
+                optie_lower = optie.lower()
+                if optie_lower == 'onthoudbestand':
+                    self._onthoudCache = str(waarde) == 'True'
+                elif optie_lower == 'laatstebestand':
+                    self._laatsteBestandCache = str(waarde)
+            if not self._inBatch:
+                self.flush()
+            if logger.isEnabledFor("INFO"):
+                logger.logInfo(f"Instelling {bestaande_sectie}.{optie} ingesteld op {waarde}")
         except Exception as e:
             logger.logFout(f"Fout bij instellen {sectie}.{optie}: {e}")
     
-    def slaOp(self):
-        """Sla instellingen op naar bestand"""
+    def flush(self):
+        """Schrijf uitstaande wijzigingen naar bestand, als die er zijn"""
+        if self._dirty:
+            self.slaOp()
+            self._dirty = False
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager om meerdere instellingen in één keer op te slaan
+
+        Binnen het with-blok schrijft stelIn niet naar schijf; bij het
+        verlaten van het blok worden alle wijzigingen in één keer
+        weggeschreven via flush().
+
+        Gebruik:
+            with instellingen.batch():
+                instellingen.stelIn('Algemeen', 'OnthoudBestand', 'True')
+                instellingen.stelIn('Algemeen', 'LaatsteBestand', pad)
+        """
+        self._inBatch = True
         try:
-            with open(self.configBestand, 'w', encoding='utf-8') as bestand:
-                self.config.write(bestand)
+            yield self
+        finally:
+            self._inBatch = False
+            self.flush()
+
+    def slaOp(self, duurzaam=False):
+        """
+        Sla instellingen op naar bestand
+
+        Serialiseert eerst naar een buffer in het geheugen en schrijft die
+        in één keer naar een tijdelijk bestand dat atomair het oude
+        vervangt, zodat een crash nooit een half geschreven INI achterlaat.
+
+        Args:
+            duurzaam (bool): True om de schrijfactie met fsync naar schijf
+                te forceren; standaard wordt dat aan het OS overgelaten en
+                gebeurt de fsync eenmalig bij het afsluiten
+        """
+        try:
+            buffer = io.StringIO()
+            self.config.write(buffer)
+            data = buffer.getvalue().encode('utf-8')
+
+            tijdelijkBestand = self.configBestand + '.tmp'
+            with open(tijdelijkBestand, 'wb') as bestand:
+                bestand.write(data)
+                if duurzaam:
+                    bestand.flush()
+                    os.fsync(bestand.fileno())
+            os.replace(tijdelijkBestand, self.configBestand)
         except Exception as e:
             logger.logFout(f"Kon instellingen niet opslaan: {e}")
+
+    def _slaOpBijAfsluiten(self):
+        """Schrijf bij het afsluiten de instellingen duurzaam naar schijf"""
+        self.slaOp(duurzaam=True)
+        self._dirty = False
     
     def haalLaatsteBestand(self):
         """
@@ -215,20 +351,10 @@ class Instellingen:
             str: Pad naar laatst gebruikte bestand of leeg als er geen is
         """
         try:
-            # Controleer eerst of de instelling bestaat
-            try:
-                onthoud = self.haalOp('Algemeen', 'OnthoudBestand') == 'True'
-            except Exception as e:
-                logger.logWaarschuwing(f"Kon 'OnthoudBestand' instelling niet lezen: {e}")
-                onthoud = False
-            
-            if onthoud:
-                try:
-                    bestandspad = self.haalOp('Algemeen', 'LaatsteBestand', '')
-                except Exception as e:
-                    logger.logWaarschuwing(f"Kon 'LaatsteBestand' instelling niet lezen: {e}")
-                    return ''
-                
+            # Gebruik de caches; die worden door stelIn synchroon gehouden
+            if self._onthoudCache:
+                bestandspad = self._laatsteBestandCache
+
                 # Controleer of het bestand bestaat
                 try:
                     absoluut_pad = maak_absoluut_pad(bestandspad)
@@ -248,7 +374,10 @@ class Instellingen:
     def stelLaatsteBestandIn(self, bestandspad):
         """
         Sla het laatst gebruikte bestand op
-        
+
+        Combineer meerdere aanroepen binnen een `with instellingen.batch():`
+        blok om het aantal schrijfacties naar schijf te beperken.
+
         Args:
             bestandspad (str): Pad naar het bestand
         """
@@ -259,7 +388,10 @@ class Instellingen:
     def stelOnthoudBestandIn(self, onthoud):
         """
         Stel in of het laatst gebruikte bestand moet worden onthouden
-        
+
+        Combineer meerdere aanroepen binnen een `with instellingen.batch():`
+        blok om het aantal schrijfacties naar schijf te beperken.
+
         Args:
             onthoud (bool): True als het bestand moet worden onthouden
         """
@@ -283,7 +415,23 @@ class Instellingen:
         return standaard
 
 # Singleton instance voor gebruik in de hele applicatie
-instellingen = Instellingen()
+#
+# De instantie wordt lazy aangemaakt (PEP 562): het lezen en eventueel
+# aanmaken van het configuratiebestand gebeurt pas bij het eerste echte
+# gebruik, niet al bij het importeren van deze module.
+_instellingen = None
+
+def _haalInstellingen():
+    """Haal de singleton Instellingen op, maak deze aan indien nodig"""
+    global _instellingen
+    if _instellingen is None:
+        _instellingen = Instellingen()
+    return _instellingen
+
+def __getattr__(name):
+    if name == 'instellingen':
+        return _haalInstellingen()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def stelRentproGebruikersnaamIn(gebruikersnaam):
     """
@@ -292,7 +440,7 @@ def stelRentproGebruikersnaamIn(gebruikersnaam):
     Args:
         gebruikersnaam (str): De gebruikersnaam voor Rentpro
     """
-    instellingen.stelIn('Rentpro', 'Gebruikersnaam', gebruikersnaam)
+    _haalInstellingen().stelIn('Rentpro', 'Gebruikersnaam', gebruikersnaam)
 
 def stelRentproWachtwoordIn(wachtwoord):
     """
@@ -301,7 +449,7 @@ def stelRentproWachtwoordIn(wachtwoord):
     Args:
         wachtwoord (str): Het wachtwoord voor Rentpro
     """
-    instellingen.stelIn('Rentpro', 'Wachtwoord', wachtwoord)
+    _haalInstellingen().stelIn('Rentpro', 'Wachtwoord', wachtwoord)
 
 def haalRentproGebruikersnaam():
     """
@@ -310,7 +458,7 @@ def haalRentproGebruikersnaam():
     Returns:
         str: De opgeslagen gebruikersnaam of een lege string
     """
-    return instellingen.haalOp('Rentpro', 'Gebruikersnaam', '')
+    return _haalInstellingen().haalOp('Rentpro', 'Gebruikersnaam', '')
 
 def haalRentproWachtwoord():
     """
@@ -319,7 +467,7 @@ def haalRentproWachtwoord():
     Returns:
         str: Het opgeslagen wachtwoord of een lege string
     """
-    return instellingen.haalOp('Rentpro', 'Wachtwoord', '')
+    return _haalInstellingen().haalOp('Rentpro', 'Wachtwoord', '')
 
 def stelRentproURLIn(url):
     """
@@ -328,7 +476,7 @@ def stelRentproURLIn(url):
     Args:
         url (str): De URL voor de Rentpro back-office
     """
-    instellingen.stelIn('Rentpro', 'URL', url)
+    _haalInstellingen().stelIn('Rentpro', 'URL', url)
 
 def haalRentproURL():
     """
@@ -337,4 +485,4 @@ def haalRentproURL():
     Returns:
         str: De opgeslagen URL of een standaard URL
     """
-    return instellingen.haalOp('Rentpro', 'URL', 'http://metroeventsdc.rentpro5.nl/')
+    return _haalInstellingen().haalOp('Rentpro', 'URL', 'http://metroeventsdc.rentpro5.nl/')